@@ -1,4 +1,5 @@
 import heapq
+import random
 
 # Constantes para cálculo de prioridade
 PESOS_VEGETACAO = {
@@ -24,6 +25,26 @@ def calcular_prioridade(chamada):
     
     return severidade_ajustada * peso
 
+# Pontos de prioridade ganhos por minuto de espera na fila
+TAXA_ENVELHECIMENTO = 0.05
+
+def calcular_prioridade_efetiva(chamada, agora, taxa=TAXA_ENVELHECIMENTO):
+    """
+    Calcula a prioridade considerando o tempo de espera do chamado
+    prioridade_efetiva = prioridade + taxa * minutos_em_espera
+    """
+    espera = (agora - chamada['recebida_em']) / 60
+    return calcular_prioridade(chamada) + taxa * espera
+
+def chave_envelhecimento(prioridade, recebida_em, taxa=TAXA_ENVELHECIMENTO):
+    """
+    Chave de ordenação invariante no tempo para o envelhecimento linear.
+    Como todos os chamados envelhecem na mesma taxa, a prioridade efetiva
+    em qualquer instante t é chave + taxa * t / 60, então a ordem entre os
+    chamados não muda com o tempo e o heap não precisa ser reconstruído
+    """
+    return prioridade - taxa * recebida_em / 60
+
 def calcular_menor_caminho(grafo, origem, destino):
     """
     Implementação do algoritmo de Dijkstra para encontrar o caminho mais curto
@@ -64,6 +85,169 @@ def calcular_menor_caminho(grafo, origem, destino):
     # Caso não encontre caminho
     return None, float('inf')
 
+def calcular_cobertura(grafo, bases, limite=float('inf')):
+    """
+    Dijkstra com múltiplas origens limitado por tempo: todas as bases partem
+    juntas da fila e a busca para de expandir caminhos acima do limite
+    
+    Args:
+        grafo: dicionário representando o grafo {nó: {vizinho: peso, ...}, ...}
+        bases: locais de partida das equipes
+        limite: tempo máximo de deslocamento considerado
+        
+    Returns:
+        dicionário {nó: (base mais próxima, tempo)} com os nós alcançados
+    """
+    fila = [(0, base, base) for base in bases]
+    heapq.heapify(fila)
+    melhores = {base: 0 for base in bases}
+    cobertura = {}
+    
+    while fila:
+        custo, atual, base = heapq.heappop(fila)
+        
+        # Evita revisitar nós: a primeira retirada já é a base mais próxima
+        if atual in cobertura:
+            continue
+        
+        cobertura[atual] = (base, custo)
+        
+        for vizinho, peso in grafo.get(atual, {}).items():
+            novo_custo = custo + peso
+            if novo_custo <= limite and novo_custo < melhores.get(vizinho, float('inf')):
+                melhores[vizinho] = novo_custo
+                heapq.heappush(fila, (novo_custo, vizinho, base))
+    
+    return cobertura
+
+def inverter_grafo(grafo):
+    """Retorna o grafo com o sentido de todas as arestas invertido"""
+    inverso = {}
+    for origem, vizinhos in grafo.items():
+        inverso.setdefault(origem, {})
+        for destino, peso in vizinhos.items():
+            inverso.setdefault(destino, {})[origem] = peso
+    return inverso
+
+# Máximo de nós visitados nas buscas a partir das demandas ao estimar os ganhos
+ORCAMENTO_POSICIONAMENTO = 1_000_000
+# Candidatos de maior ganho estimado cujo ganho exato é conferido a cada escolha
+VERIFICACAO_POSICIONAMENTO = 32
+
+def sugerir_posicionamento(grafo, bases, limite, quantidade=1, candidatos=None, demandas=None,
+                           pesos=None, orcamento=ORCAMENTO_POSICIONAMENTO,
+                           verificar=VERIFICACAO_POSICIONAMENTO, seed=0):
+    """
+    Escolhe gulosamente onde posicionar novas equipes para cobrir o maior
+    número de locais ainda não alcançados dentro do limite de tempo.
+    
+    O ganho de cada candidato é contado a partir das demandas descobertas:
+    uma busca limitada no grafo invertido, partindo de cada demanda, encontra
+    os locais que a alcançam. Assim só são considerados candidatos a até
+    `limite` de alguma demanda descoberta, e nenhum conjunto de alcance é
+    guardado. Quando uma demanda passa a ser coberta, os ganhos dos locais
+    que a alcançavam são decrementados; como os ganhos só diminuem, o heap
+    guarda limites superiores e só o topo precisa ser conferido.
+    
+    As demandas são percorridas em ordem aleatória até que as buscas visitem
+    `orcamento` nós; se nem todas couberem, os ganhos são estimados pela
+    amostra percorrida e o custo deixa de crescer com o tamanho do grafo.
+    A cada escolha, os `verificar` candidatos de maior
+    ganho estimado têm o ganho exato calculado e o melhor deles é escolhido
+    
+    Args:
+        grafo: dicionário representando o grafo {nó: {vizinho: peso, ...}, ...}
+        bases: locais onde já existem equipes
+        limite: tempo máximo de deslocamento considerado
+        quantidade: número de novas equipes a posicionar
+        candidatos: locais possíveis para as novas equipes (padrão: todos os nós)
+        demandas: locais que precisam de cobertura (padrão: todos os nós)
+        pesos: importância de cada local {nó: peso} (padrão: 1)
+        orcamento: máximo de nós visitados na estimativa (None usa todas as demandas)
+        verificar: quantos candidatos conferir com o ganho exato a cada escolha
+        seed: semente da amostragem
+        
+    Returns:
+        lista de {'local', 'ganho', 'cobertos'} na ordem de escolha
+    """
+    if demandas is None:
+        demandas = set(grafo)
+        for vizinhos in grafo.values():
+            demandas.update(vizinhos)
+    else:
+        demandas = set(demandas)
+    candidatos = None if candidatos is None else set(candidatos)
+    pesos = pesos or {}
+    
+    cobertura = calcular_cobertura(grafo, bases, limite)
+    descobertas = {demanda for demanda in demandas if demanda not in cobertura}
+    inverso = inverter_grafo(grafo)
+    
+    ordem = sorted(descobertas, key=str)
+    random.Random(seed).shuffle(ordem)
+    
+    ganhos = {}
+    estimadas = set()
+    visitas = 0
+    for demanda in ordem:
+        if orcamento is not None and visitas >= orcamento:
+            break
+        estimadas.add(demanda)
+        alcance = calcular_cobertura(inverso, [demanda], limite)
+        visitas += len(alcance)
+        peso = pesos.get(demanda, 1)
+        for local in alcance:
+            if candidatos is None or local in candidatos:
+                ganhos[local] = ganhos.get(local, 0) + peso
+    
+    fila = [(-ganho, local) for local, ganho in ganhos.items() if ganho > 0]
+    heapq.heapify(fila)
+    
+    def alcance_descoberto(local):
+        return [no for no in calcular_cobertura(grafo, [local], limite) if no in descobertas]
+    
+    escolhidos = []
+    while fila and len(escolhidos) < quantidade:
+        # Separa os melhores candidatos pelo ganho estimado (atualizado)
+        finalistas = []
+        while fila and len(finalistas) < verificar:
+            chave, candidato = heapq.heappop(fila)
+            ganho = ganhos[candidato]
+            if ganho <= 0:
+                continue
+            # Ganho desatualizado: volta ao heap com o valor atual
+            if ganho < -chave:
+                heapq.heappush(fila, (-ganho, candidato))
+                continue
+            finalistas.append(candidato)
+        if not finalistas:
+            break
+        
+        # Entre os finalistas, escolhe pelo ganho exato
+        avaliados = []
+        for candidato in finalistas:
+            novas = alcance_descoberto(candidato)
+            avaliados.append((sum(pesos.get(no, 1) for no in novas), candidato, novas))
+        ganho, candidato, novas = max(avaliados, key=lambda avaliado: avaliado[0])
+        for _, outro, _ in avaliados:
+            if outro != candidato:
+                heapq.heappush(fila, (-ganhos[outro], outro))
+        if ganho <= 0:
+            break
+        
+        for demanda in novas:
+            descobertas.discard(demanda)
+            if demanda not in estimadas:
+                continue
+            peso = pesos.get(demanda, 1)
+            for local in calcular_cobertura(inverso, [demanda], limite):
+                if local in ganhos:
+                    ganhos[local] -= peso
+        
+        escolhidos.append({'local': candidato, 'ganho': ganho, 'cobertos': len(novas)})
+    
+    return escolhidos
+
 def sugerir_acoes(chamada):
     """
     Sugere ações baseadas nas características do chamado
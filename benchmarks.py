@@ -0,0 +1,270 @@
+import heapq
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import central as modulo_central
+from algoritmos import calcular_cobertura, sugerir_posicionamento
+from central import CentralQueimadas
+from estruturas import TreeNode
+from hierarquia import salvar_hierarquia
+from mapas import carregar_mapa
+from modelos import Equipe, RegiaoBrasil
+
+VEGETACOES = ['cerrado', 'mata_atlantica', 'pantanal', 'amazonia', 'caatinga']
+
+# Orçamentos de inicialização (segundos)
+ORCAMENTO_IMPORTACAO = 0.2
+ORCAMENTO_CENTRAIS = 0.1
+ORCAMENTO_PRIMEIRO_USO = 0.5
+
+
+class RelogioSimulado:
+    """Relógio controlado pelo benchmark para simular a passagem do tempo"""
+    def __init__(self, inicio=0.0):
+        self.agora = inicio
+    
+    def __call__(self):
+        return self.agora
+
+
+def _medir(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def benchmark_envelhecimento(pendentes=100_000, atendimentos=2_000, intervalo=100, locais=500, seed=42):
+    """
+    Compara o heap com chaves invariantes no tempo (reprecificando só os
+    locais com mudança de clima) com a reconstrução completa do heap a
+    cada `intervalo` atendimentos
+    """
+    def executar(reconstruir):
+        rng = random.Random(seed)
+        relogio = RelogioSimulado()
+        central = CentralQueimadas({}, relogio=relogio, janela_agrupamento=None)
+        central.adicionar_equipe(Equipe(1, "Equipe Alfa", "Base Central"))
+        
+        for i in range(pendentes):
+            relogio.agora += 1
+            central.receber_chamada({
+                'id': i,
+                'local': f"Local {rng.randrange(locais)}",
+                'severidade': rng.randint(1, 5),
+                'tipo_vegetacao': rng.choice(VEGETACOES),
+                'clima': rng.choice(['seco', 'umido'])
+            })
+        
+        def atender():
+            for i in range(atendimentos):
+                relogio.agora += 30
+                if i % intervalo == 0:
+                    local = f"Local {rng.randrange(locais)}"
+                    central.atualizar_clima(local, rng.choice(['seco', 'umido']))
+                    if reconstruir:
+                        central.organizar_prioridade()
+                central.atender_proxima_chamada()
+                central.liberar_equipe(1)
+        
+        return _medir(atender), [c['ocorrencia_id'] for c in central.chamadas_atendidas]
+    
+    tempo_incremental, ordem_incremental = executar(reconstruir=False)
+    tempo_reconstrucao, ordem_reconstrucao = executar(reconstruir=True)
+    
+    print(f"Envelhecimento de prioridade ({pendentes} chamadas pendentes, {atendimentos} atendimentos)")
+    print(f"  heap incremental:            {tempo_incremental:.3f}s")
+    print(f"  {f'reconstrução a cada {intervalo}:':<29}{tempo_reconstrucao:.3f}s")
+    print(f"  mesma ordem de atendimento:  {ordem_incremental == ordem_reconstrucao}")
+
+
+
+def benchmark_regioes(estados=27, municipios=200, zonas=20, centrais=1_000):
+    """
+    Mede a importação do sistema, a criação de várias centrais e o primeiro
+    uso de uma hierarquia de regiões sintética com mais de 100 mil nós
+    """
+    raiz = TreeNode("Brasil", tipo="país", id="BR")
+    for e in range(estados):
+        estado = raiz.adicionar_filho(TreeNode(f"Estado {e}", tipo="estado", id=f"{e}"))
+        for m in range(municipios):
+            municipio = estado.adicionar_filho(
+                TreeNode(f"Município {e}-{m}", tipo="município", id=f"{e}-{m}"))
+            for z in range(zonas):
+                municipio.adicionar_filho(TreeNode(f"Zona {e}-{m}-{z}", tipo="zona", id=f"{e}-{m}-{z}"))
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = salvar_hierarquia(raiz, os.path.join(diretorio, "regioes.bin"))
+        tamanho = os.path.getsize(arquivo)
+        
+        codigo = "import time; t = time.perf_counter(); import central; print(time.perf_counter() - t)"
+        saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        tempo_importacao = float(saida.stdout)
+        
+        regiao = RegiaoBrasil(arquivo)
+        tempo_centrais = _medir(lambda: [CentralQueimadas({}, regiao=regiao) for _ in range(centrais)])
+        tempo_primeiro_uso = _medir(lambda: regiao.buscar_zona("Zona 26-199-19"))
+        tempo_consulta = _medir(lambda: regiao.obter_hierarquia_completa("Zona 13-100-10"))
+    
+    print(f"Hierarquia de regiões ({len(regiao)} nós, arquivo de {tamanho / 1024:.0f} KiB)")
+    print(f"  importação do sistema:       {tempo_importacao:.3f}s (orçamento {ORCAMENTO_IMPORTACAO}s)")
+    print(f"  {f'criação de {centrais} centrais:':<29}{tempo_centrais:.3f}s (orçamento {ORCAMENTO_CENTRAIS}s)")
+    print(f"  primeiro uso (carga+índice): {tempo_primeiro_uso:.3f}s (orçamento {ORCAMENTO_PRIMEIRO_USO}s)")
+    print(f"  consulta de hierarquia:      {tempo_consulta * 1e6:.0f}µs")
+    dentro = (tempo_importacao <= ORCAMENTO_IMPORTACAO and tempo_centrais <= ORCAMENTO_CENTRAIS
+              and tempo_primeiro_uso <= ORCAMENTO_PRIMEIRO_USO)
+    print(f"  dentro do orçamento:         {dentro}")
+
+
+
+def benchmark_cobertura(lado=500, bases=200, limite=60, novas_equipes=10, seed=42):
+    """
+    Mede a análise de cobertura (Dijkstra com múltiplas origens) e o
+    posicionamento guloso de novas equipes em uma malha viária do
+    tamanho de um estado
+    """
+    rng = random.Random(seed)
+    grafo = {}
+    for x in range(lado):
+        for y in range(lado):
+            vizinhos = grafo.setdefault((x, y), {})
+            for dx, dy in ((1, 0), (0, 1)):
+                if x + dx < lado and y + dy < lado:
+                    peso = rng.randint(5, 10)
+                    vizinhos[(x + dx, y + dy)] = peso
+                    grafo.setdefault((x + dx, y + dy), {})[(x, y)] = peso
+    
+    locais_bases = rng.sample(list(grafo), bases)
+    
+    inicio = time.perf_counter()
+    cobertura = calcular_cobertura(grafo, locais_bases, limite)
+    tempo_cobertura = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    escolhidos = sugerir_posicionamento(grafo, locais_bases, limite, novas_equipes)
+    tempo_posicionamento = time.perf_counter() - inicio
+    
+    print(f"Cobertura ({len(grafo)} locais, {bases} bases, limite de {limite} minutos)")
+    print(f"  locais cobertos:             {len(cobertura)}")
+    print(f"  análise de cobertura:        {tempo_cobertura:.3f}s")
+    print(f"  {f'posicionar {novas_equipes} equipes:':<29}{tempo_posicionamento:.3f}s")
+    print(f"  novos locais cobertos:       {sum(e['cobertos'] for e in escolhidos)}")
+
+
+
+class ContadorOperacoes:
+    """
+    Substitui temporariamente as operações de heap e o cálculo de rotas
+    usados pela central por versões que contam as chamadas
+    """
+    def __init__(self):
+        self.heap = 0
+        self.rotas = 0
+    
+    def __enter__(self):
+        contador = self
+        
+        class HeapContado:
+            @staticmethod
+            def heappush(heap, item):
+                contador.heap += 1
+                heapq.heappush(heap, item)
+            
+            @staticmethod
+            def heappop(heap):
+                contador.heap += 1
+                return heapq.heappop(heap)
+            
+            heapify = staticmethod(heapq.heapify)
+        
+        def rota_contada(*args):
+            contador.rotas += 1
+            return self._rota(*args)
+        
+        self._heapq, self._rota = modulo_central.heapq, modulo_central.calcular_menor_caminho
+        modulo_central.heapq, modulo_central.calcular_menor_caminho = HeapContado, rota_contada
+        return self
+    
+    def __exit__(self, *exc):
+        modulo_central.heapq, modulo_central.calcular_menor_caminho = self._heapq, self._rota
+
+
+def benchmark_agrupamento(incidentes=200, reportes_por_incidente=25, seed=42):
+    """
+    Reproduz um surto em que dezenas de pessoas reportam o mesmo local e
+    compara as operações de heap e rotas calculadas com e sem agrupamento
+    """
+    rng = random.Random(seed)
+    mapa = {"Base Central": {f"Local {i}": rng.randint(5, 60) for i in range(incidentes)}}
+    reportes = []
+    instante = 0
+    for i in range(incidentes * reportes_por_incidente):
+        instante += rng.uniform(0, 2)
+        reportes.append({
+            'id': i,
+            'local': f"Local {rng.randrange(incidentes)}",
+            'severidade': rng.randint(1, 5),
+            'tipo_vegetacao': rng.choice(VEGETACOES),
+            'clima': 'seco',
+            'recebida_em': instante
+        })
+    
+    def executar(janela):
+        central = CentralQueimadas(mapa, relogio=RelogioSimulado(instante), janela_agrupamento=janela)
+        central.adicionar_equipe(Equipe(1, "Equipe Alfa", "Base Central"))
+        with ContadorOperacoes() as contador:
+            for reporte in reportes:
+                central.receber_chamada(dict(reporte))
+            while central.heap_prioridade:
+                resultado = central.atender_proxima_chamada()
+                if resultado:
+                    central.liberar_equipe(1)
+                    central.equipes[0].local = "Base Central"
+        return contador, len(central.chamadas_atendidas)
+    
+    sem, despachos_sem = executar(None)
+    com, despachos_com = executar(modulo_central.JANELA_AGRUPAMENTO)
+    
+    print(f"Agrupamento de chamadas ({len(reportes)} reportes de {incidentes} locais)")
+    print(f"  despachos:                   {despachos_sem} -> {despachos_com}")
+    print(f"  operações de heap:           {sem.heap} -> {com.heap} ({sem.heap - com.heap} a menos)")
+    print(f"  rotas calculadas:            {sem.rotas} -> {com.rotas} ({sem.rotas - com.rotas} a menos)")
+
+
+
+def benchmark_mapa(arestas=1_000_000, nos=200_000, seed=42):
+    """
+    Mede a carga da malha viária a partir de um arquivo de arestas: a
+    primeira carga lê o CSV e grava o cache, as seguintes leem só o cache
+    """
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo = os.path.join(diretorio, "malha.csv")
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write("from,to,minutes\n")
+            for _ in range(arestas):
+                f.write(f"n{rng.randrange(nos)},n{rng.randrange(nos)},{rng.randint(1, 60)}\n")
+        
+        tempo_primeira = _medir(lambda: carregar_mapa(arquivo))
+        tempo_cache = _medir(lambda: carregar_mapa(arquivo))
+        tempo_sem_cache = _medir(lambda: carregar_mapa(arquivo, usar_cache=False))
+    
+    print(f"Carga da malha viária ({arestas} arestas, não direcionada)")
+    print(f"  primeira carga (CSV+cache):  {tempo_primeira:.3f}s")
+    print(f"  carga pelo cache:            {tempo_cache:.3f}s")
+    print(f"  carga sem cache:             {tempo_sem_cache:.3f}s")
+
+
+if __name__ == "__main__":
+    benchmark_envelhecimento()
+    print()
+    benchmark_regioes()
+    print()
+    benchmark_cobertura()
+    print()
+    benchmark_agrupamento()
+    print()
+    benchmark_mapa()
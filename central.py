@@ -1,28 +1,65 @@
 import heapq
+import itertools
+import time
 from collections import deque
 from estruturas import AreaLinkedList
-from algoritmos import calcular_prioridade, calcular_menor_caminho, sugerir_acoes
-from modelos import Chamada, Equipe, RegiaoBrasil
+from algoritmos import (
+    calcular_prioridade, calcular_menor_caminho, sugerir_acoes,
+    calcular_cobertura, sugerir_posicionamento,
+    calcular_prioridade_efetiva, chave_envelhecimento, TAXA_ENVELHECIMENTO
+)
+from modelos import Chamada, Equipe, RegiaoBrasil, StatusRegioes, MAX_MISSOES_EQUIPE
+from metricas import MetricasAtendimento
+
+# Intervalo (minutos) em que chamadas para o mesmo local são agrupadas em um incidente
+JANELA_AGRUPAMENTO = 30
+
+# Quantidade de missões arquivadas mantidas em memória pela central
+MAX_MISSOES_ARQUIVADAS = 10_000
 
 class CentralQueimadas:
     """
     Classe principal que gerencia o sistema de combate a queimadas
     """
-    def __init__(self, mapa, equipes=None):
+    def __init__(self, mapa, equipes=None, relogio=None, taxa_envelhecimento=TAXA_ENVELHECIMENTO,
+                 regiao=None, janela_agrupamento=JANELA_AGRUPAMENTO,
+                 max_missoes_arquivadas=MAX_MISSOES_ARQUIVADAS, arquivar_missao=None):
         """
         Inicializa a Central de Queimadas
         
         Args:
             mapa: dicionário representando o grafo de locais e estradas
             equipes: lista de equipes disponíveis
+            relogio: função que retorna o instante atual em segundos
+            taxa_envelhecimento: pontos de prioridade ganhos por minuto de espera
+            regiao: hierarquia de regiões (por padrão, a instância compartilhada)
+            janela_agrupamento: minutos para agrupar chamadas do mesmo local
+                (None desativa o agrupamento)
+            max_missoes_arquivadas: missões antigas das equipes guardadas em
+                missoes_arquivadas; as mais antigas saem primeiro (None: sem limite)
+            arquivar_missao: função chamada com cada missão arquivada, para
+                guardá-la fora da memória (ex.: em arquivo ou banco de dados)
         """
         self.mapa = mapa
         self.equipes = equipes or []
-        self.fila_chamadas = deque()  # Fila por ordem de chegada
+        self.relogio = relogio or time.time
+        self.taxa_envelhecimento = taxa_envelhecimento
         self.heap_prioridade = []  # Heap para priorização
+        self.entradas_heap = {}  # chamada -> entrada ativa no heap
+        self.pendentes_por_local = {}  # local -> {chamada: None} aguardando no heap, em ordem de chegada
+        self._sequencia = itertools.count()  # Desempate por ordem de chegada
+        self._versoes = itertools.count()  # Distingue entradas da mesma chamada no heap
+        self.janela_agrupamento = janela_agrupamento
+        self.chamadas_agrupadas = 0  # Chamadas unidas a um incidente já na fila
         self.areas = AreaLinkedList()  # Status das áreas
-        self.regiao = RegiaoBrasil()  # Hierarquia geográfica
+        self.regiao = regiao if regiao is not None else RegiaoBrasil.compartilhada()  # Hierarquia geográfica
+        self.status_regioes = StatusRegioes(self.regiao)  # Contagens por região
         self.chamadas_atendidas = []  # Histórico
+        self.missoes_arquivadas = deque(maxlen=max_missoes_arquivadas)  # Missões removidas do registro das equipes
+        self.arquivar_missao = arquivar_missao
+        for equipe in self.equipes:
+            self._conectar_historico(equipe)
+        self.metricas = MetricasAtendimento()  # Percentis por janela de tempo
     
     def adicionar_equipe(self, equipe):
         """Adiciona uma equipe à central"""
@@ -33,41 +70,176 @@ class CentralQueimadas:
                 local=equipe['local'], 
                 especialidade=equipe.get('especialidade')
             )
+        self._conectar_historico(equipe)
         self.equipes.append(equipe)
     
+    def _conectar_historico(self, equipe):
+        """Arquiva no histórico da central as missões antigas da equipe e limita as mantidas em memória"""
+        if equipe.acoes.arquivar is None:
+            equipe.acoes.arquivar = self._arquivar_missao(equipe)
+        if equipe.acoes.max_missoes is None:
+            equipe.acoes.max_missoes = MAX_MISSOES_EQUIPE
+    
+    def _arquivar_missao(self, equipe):
+        """Cria a função que guarda no histórico as missões antigas da equipe"""
+        def arquivar(missao):
+            missao['equipe_id'] = equipe.id
+            self.missoes_arquivadas.append(missao)
+            if self.arquivar_missao:
+                self.arquivar_missao(missao)
+        return arquivar
+    
     def receber_chamada(self, chamada):
-        """Recebe uma nova chamada de emergência e adiciona à fila"""
+        """
+        Recebe uma nova chamada de emergência e adiciona à fila.
+        Se já houver uma chamada pendente para o mesmo local dentro da janela
+        de agrupamento, as duas são unidas em um único incidente.
+        Retorna a chamada que representa o incidente na fila
+        """
         if isinstance(chamada, dict):
             chamada = Chamada.from_dict(chamada)
-        self.fila_chamadas.append(chamada)
+        if chamada.recebida_em is None:
+            chamada.recebida_em = self.relogio()
+        if chamada.ultimo_reporte_em is None:
+            chamada.ultimo_reporte_em = chamada.recebida_em
+        
+        # Nomes repetidos na hierarquia (ex.: São Paulo) são recusados aqui,
+        # antes de entrar na fila, e não no momento do atendimento
+        self.regiao.buscar_zona(chamada.local)
+        
+        incidente = self._buscar_incidente(chamada)
+        if incidente:
+            self._agrupar_chamada(incidente, chamada)
+            return incidente
+        
+        self._enfileirar(chamada)
+        return chamada
     
-    def organizar_prioridade(self):
-        """Reorganiza os chamados por prioridade utilizando um heap"""
-        self.heap_prioridade = []
+    def _buscar_incidente(self, chamada):
+        """
+        Procura uma chamada pendente no mesmo local cujo reporte mais recente
+        esteja dentro da janela de agrupamento. Havendo mais de uma, escolhe
+        a que chegou por último, independente da ordem de hash
+        """
+        if not self.janela_agrupamento:
+            return None
         
-        for chamada in self.fila_chamadas:
-            prioridade = calcular_prioridade(chamada.to_dict())
-            chamada.prioridade = prioridade
-            # Negativo pois heapq é um min-heap e queremos um max-heap
-            heapq.heappush(self.heap_prioridade, (-prioridade, chamada))
+        limite = self.janela_agrupamento * 60
+        for pendente in reversed(self.pendentes_por_local.get(chamada.local, {})):
+            if abs(chamada.recebida_em - pendente.ultimo_reporte_em) <= limite:
+                return pendente
+        return None
+    
+    def _agrupar_chamada(self, incidente, chamada):
+        """Une uma chamada duplicada ao incidente, mantendo a maior severidade"""
+        detalhes = incidente.detalhes
+        detalhes['reportes'] = detalhes.get('reportes', 1) + 1
+        detalhes.setdefault('chamadas_agrupadas', []).append(chamada.id)
+        incidente.ultimo_reporte_em = max(incidente.ultimo_reporte_em, chamada.recebida_em)
+        for chave, valor in chamada.detalhes.items():
+            detalhes.setdefault(chave, valor)
+        self.chamadas_agrupadas += 1
+        
+        if chamada.severidade > incidente.severidade:
+            incidente.severidade = chamada.severidade
+            self._reprecificar(incidente)
+    
+    def _reprecificar(self, chamada):
+        """
+        Invalida a entrada atual da chamada no heap e insere a nova prioridade,
+        mantendo a sequência original para não perder a ordem de chegada
+        """
+        entrada = self.entradas_heap[chamada]
+        entrada[-1] = None
+        heapq.heappush(self.heap_prioridade, self._criar_entrada(chamada, entrada[1]))
+        
+        # Reconstrói quando as entradas inválidas dominam o heap
+        if len(self.heap_prioridade) > 2 * len(self.entradas_heap) + 64:
+            self.heap_prioridade = [e for e in self.heap_prioridade if e[-1] is not None]
+            heapq.heapify(self.heap_prioridade)
+    
+    def _criar_entrada(self, chamada, sequencia=None):
+        """Calcula a chave invariante no tempo e cria a entrada do heap"""
+        chamada.prioridade = calcular_prioridade(chamada.to_dict())
+        chave = chave_envelhecimento(chamada.prioridade, chamada.recebida_em, self.taxa_envelhecimento)
+        if sequencia is None:
+            sequencia = next(self._sequencia)
+        # Negativo pois heapq é um min-heap e queremos um max-heap. A versão
+        # evita comparar a chamada com uma entrada invalidada de mesma chave
+        entrada = [-chave, sequencia, next(self._versoes), chamada]
+        self.entradas_heap[chamada] = entrada
+        return entrada
+    
+    def _enfileirar(self, chamada):
+        """Insere a chamada no heap de prioridade em O(log n)"""
+        heapq.heappush(self.heap_prioridade, self._criar_entrada(chamada))
+        self.pendentes_por_local.setdefault(chamada.local, {})[chamada] = None
+    
+    def _remover_pendente(self, chamada):
+        """Retira a chamada dos índices de pendentes"""
+        self.entradas_heap.pop(chamada, None)
+        pendentes = self.pendentes_por_local.get(chamada.local)
+        if pendentes:
+            pendentes.pop(chamada, None)
+            if not pendentes:
+                del self.pendentes_por_local[chamada.local]
+    
+    def _descartar_invalidas(self):
+        """Remove do topo do heap as entradas substituídas por uma reprecificação"""
+        while self.heap_prioridade and self.heap_prioridade[0][-1] is None:
+            heapq.heappop(self.heap_prioridade)
+    
+    def prioridade_efetiva(self, chamada, agora=None):
+        """Prioridade da chamada no instante atual, considerando o tempo de espera"""
+        agora = self.relogio() if agora is None else agora
+        return calcular_prioridade_efetiva(chamada.to_dict(), agora, self.taxa_envelhecimento)
+    
+    def atualizar_clima(self, local, clima):
+        """
+        Atualiza o clima informado para um local e reprecifica apenas as
+        chamadas pendentes daquele local. As entradas antigas são marcadas
+        como inválidas e descartadas quando chegarem ao topo do heap
+        """
+        reprecificadas = 0
+        for chamada in self.pendentes_por_local.get(local, ()):
+            if chamada.clima == clima:
+                continue
+            chamada.clima = clima
+            self._reprecificar(chamada)
+            reprecificadas += 1
+        return reprecificadas
+    
+    def organizar_prioridade(self):
+        """Reorganiza todos os chamados pendentes por prioridade (reconstrução completa)"""
+        pendentes = sorted(self.entradas_heap.values(), key=lambda entrada: entrada[1])
+        self.heap_prioridade = [
+            self._criar_entrada(entrada[-1], entrada[1]) for entrada in pendentes
+        ]
+        heapq.heapify(self.heap_prioridade)
     
     def atender_proxima_chamada(self):
         """Atende a próxima chamada de maior prioridade"""
+        self._descartar_invalidas()
         if not self.heap_prioridade:
             return None
             
         if not any(equipe.disponivel for equipe in self.equipes):
             return {"erro": "Todas as equipes estão ocupadas"}
         
-        _, chamada = heapq.heappop(self.heap_prioridade)
+        entrada = heapq.heappop(self.heap_prioridade)
+        chamada = entrada[-1]
         
         # Encontra a primeira equipe disponível
         equipe = next((eq for eq in self.equipes if eq.disponivel), None)
         if not equipe:
             # Recolocar a chamada no heap
-            heapq.heappush(self.heap_prioridade, (-chamada.prioridade, chamada))
+            heapq.heappush(self.heap_prioridade, entrada)
             return {"erro": "Sem equipes disponíveis"}
         
+        self._remover_pendente(chamada)
+        agora = self.relogio()
+        prioridade = self.prioridade_efetiva(chamada, agora)
+        
         # Marca a equipe como indisponível
         equipe.disponivel = False
         
@@ -82,17 +254,23 @@ class CentralQueimadas:
         # Sugere ações para esta ocorrência
         acoes = sugerir_acoes(chamada.to_dict())
         
-        # Registra as ações na pilha da equipe
+        # Registra as ações na pilha da equipe, em uma nova missão
+        equipe.iniciar_missao(chamada.id, agora)
         for acao in acoes:
             equipe.registrar_acao(acao)
         
         # Atualiza o status da área
-        self.areas.atualizar_status(chamada.local, "controle em andamento")
+        self.atualizar_status_area(chamada.local, "controle em andamento")
+        
+        # Registra os tempos do despacho nas janelas de métricas
+        tempo_espera = (agora - chamada.recebida_em) / 60
+        self._registrar_metricas(agora, chamada, tempo, tempo_espera)
         
         # Formata o resultado
         resultado = {
             'ocorrencia_id': chamada.id,
-            'prioridade': chamada.prioridade,
+            'prioridade': prioridade,
+            'tempo_espera': tempo_espera,
             'equipe': equipe.to_dict(),
             'acao': acoes,
             'rota': caminho,
@@ -108,14 +286,32 @@ class CentralQueimadas:
         
         return resultado
     
+    def _registrar_metricas(self, agora, chamada, tempo, tempo_espera):
+        """Alimenta as métricas por janela, no total, por bioma e por região"""
+        dimensoes = [('bioma', chamada.tipo_vegetacao)]
+        for nivel in self.regiao.obter_hierarquia_completa(chamada.local) or []:
+            dimensoes.append((nivel['tipo'], nivel['id']))
+        
+        self.metricas.registrar(
+            agora,
+            {'tempo_estimado': tempo, 'tempo_espera': tempo_espera},
+            dimensoes
+        )
+    
+    def percentis_atendimento(self, metrica, janela, dimensao=None, valor=None):
+        """
+        Retorna p50/p90/p99 de 'tempo_estimado' ou 'tempo_espera' (minutos)
+        na janela ('1h', '24h', '7d'), opcionalmente filtrado por bioma ou
+        região pelo id do IBGE, ex.: dimensao='estado', valor='51' (Mato Grosso)
+        """
+        return self.metricas.consultar(self.relogio(), metrica, janela, dimensao, valor)
+    
     def atender_todas_chamadas(self):
         """Atende todas as chamadas pendentes"""
         resultados = []
         
-        # Organiza as chamadas por prioridade
-        self.organizar_prioridade()
-        
-        # Atende cada chamada na ordem de prioridade
+        # Atende cada chamada na ordem de prioridade (as chaves do heap não
+        # mudam com o tempo, então não é preciso reorganizar antes)
         while self.heap_prioridade:
             resultado = self.atender_proxima_chamada()
             if resultado and not resultado.get('erro'):
@@ -133,12 +329,67 @@ class CentralQueimadas:
     
     def atualizar_status_area(self, local, status):
         """Atualiza o status de uma área"""
-        self.areas.atualizar_status(local, status)
-        
+        self.regiao.buscar_zona(local)  # recusa nomes ambíguos antes de alterar a área
+        anterior = self.areas.atualizar_status(local, status)
+        self.status_regioes.registrar(local, anterior, status)
+    
+    def contar_areas_regiao(self, regiao, status=None):
+        """Conta as áreas de uma região (estado, município ou zona) por status"""
+        return self.status_regioes.contar(regiao, status)
+    
+    def areas_por_subregiao(self, regiao, status):
+        """Conta as áreas com o status em cada subregião direta da região"""
+        return self.status_regioes.contar_por_subregiao(regiao, status)
+    
+    def regioes_mais_afetadas(self, k, status, tipo="município"):
+        """Retorna as k regiões com mais áreas no status informado"""
+        return self.status_regioes.mais_afetadas(k, status, tipo)
+    
     def obter_status_areas(self):
         """Retorna o status de todas as áreas"""
         return self.areas.listar_areas()
     
+    def analisar_cobertura(self, limite, bases=None):
+        """
+        Calcula quais locais cada base alcança dentro do limite de tempo
+        (em minutos) e lista as zonas sem cobertura agrupadas pelo id do município
+        
+        Args:
+            limite: tempo máximo de deslocamento
+            bases: locais de partida (padrão: locais atuais das equipes)
+        """
+        if bases is None:
+            bases = {equipe.local for equipe in self.equipes}
+        
+        cobertura = calcular_cobertura(self.mapa, bases, limite)
+        
+        descobertas = {}
+        for zona in self.regiao.listar_por_tipo("zona"):
+            nome = zona.nome
+            if nome not in cobertura and zona.id not in cobertura:
+                municipio = zona.pai
+                grupo = descobertas.setdefault(
+                    municipio.id if municipio else None,
+                    {'municipio': municipio.nome if municipio else None, 'zonas': []}
+                )
+                grupo['zonas'].append(nome)
+        
+        return {
+            'cobertura': {
+                local: {'base': base, 'tempo': tempo}
+                for local, (base, tempo) in cobertura.items()
+            },
+            'zonas_descobertas': descobertas
+        }
+    
+    def sugerir_posicionamento(self, limite, quantidade=1, candidatos=None, demandas=None, pesos=None):
+        """Sugere onde posicionar as próximas equipes para ampliar a cobertura"""
+        bases = {equipe.local for equipe in self.equipes}
+        return sugerir_posicionamento(
+            self.mapa, bases, limite, quantidade,
+            candidatos=candidatos, demandas=demandas, pesos=pesos
+        )
+    
     def estatisticas(self):
         """Retorna estatísticas de atendimento"""
         total_chamadas = len(self.chamadas_atendidas)
@@ -151,5 +402,6 @@ class CentralQueimadas:
         
         return {
             'total_chamadas_atendidas': total_chamadas,
+            'chamadas_agrupadas': self.chamadas_agrupadas,
             'areas_por_status': areas_por_status
         }
@@ -1,3 +1,7 @@
+import math
+from collections import deque
+from collections.abc import Sequence
+
 # Pilha para registrar ações
 class Stack:
     """
@@ -22,6 +26,145 @@ class Stack:
     def __repr__(self):
         return str(self.items)
 
+class VisaoAcoes(Sequence):
+    """
+    Visão somente leitura de um intervalo de ações do RegistroMissoes.
+    Não copia a lista: as posições são absolutas e resolvidas a cada acesso,
+    limitadas às ações ainda presentes (arquivadas ou desfeitas ficam de fora).
+    A visão de uma missão lê os limites do registro da própria missão, então
+    continua restrita a ela mesmo depois de desfazer ações e abrir outra missão.
+    Compara igual a qualquer sequência com os mesmos itens; para obter uma
+    lista (por exemplo, para serializar em JSON), use list(visao)
+    """
+    def __init__(self, registro, inicio=None, fim=None, missao=None):
+        self.registro = registro
+        self.inicio = inicio
+        self.fim = fim
+        self.missao = missao
+    
+    def _limites(self):
+        if self.missao is not None:
+            inicio = self.missao['inicio']
+            fim = self.missao['fim'] if self.missao['fim'] is not None else self.registro.total
+        else:
+            inicio, fim = self.inicio, self.fim
+        inicio = max(inicio, self.registro.base)
+        fim = min(fim, self.registro.total)
+        return inicio, max(inicio, fim)
+    
+    def __len__(self):
+        inicio, fim = self._limites()
+        return fim - inicio
+    
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        inicio, fim = self._limites()
+        if indice < 0:
+            indice += fim - inicio
+        if not 0 <= indice < fim - inicio:
+            raise IndexError("índice fora da visão de ações")
+        return self.registro.items[inicio + indice - self.registro.base]
+    
+    def __eq__(self, outro):
+        if not isinstance(outro, Sequence) or isinstance(outro, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(outro) and all(a == b for a, b in zip(self, outro))
+    
+    def __repr__(self):
+        return f"VisaoAcoes({list(self)})"
+
+class RegistroMissoes(Stack):
+    """
+    Pilha de ações segmentada por missão. Cada missão guarda seu id, o
+    instante do despacho e o início do seu intervalo de ações; as consultas
+    devolvem visões sem cópia. Ao exceder max_missoes, as missões mais
+    antigas são entregues à função arquivar e removidas da memória; sem
+    função arquivar, nada é removido
+    """
+    def __init__(self, max_missoes=None, arquivar=None):
+        super().__init__()
+        self.max_missoes = max_missoes
+        self.arquivar = arquivar
+        self.missoes = deque()  # {'id', 'despachada_em', 'inicio', 'fim'} (fim None na missão atual)
+        self.base = 0  # posição absoluta do primeiro item ainda em memória
+    
+    @property
+    def total(self):
+        """Posição absoluta logo após a última ação"""
+        return self.base + len(self.items)
+    
+    def iniciar_missao(self, missao_id, instante=None):
+        """Abre uma nova missão; as próximas ações pertencem a ela"""
+        if self.missoes:
+            self.missoes[-1]['fim'] = self.total
+        self.missoes.append({'id': missao_id, 'despachada_em': instante, 'inicio': self.total, 'fim': None})
+        if self.max_missoes is not None:
+            while len(self.missoes) > self.max_missoes:
+                if not self._arquivar_mais_antiga():
+                    break
+    
+    def _arquivar_mais_antiga(self):
+        # Sem destino para o arquivo, nenhuma missão é descartada
+        if self.arquivar is None:
+            return False
+        missao = self.missoes.popleft()
+        fim = missao['fim'] if missao['fim'] is not None else self.total
+        quantidade = fim - self.base
+        self.arquivar({
+            'missao_id': missao['id'],
+            'despachada_em': missao['despachada_em'],
+            'acoes': self.items[:quantidade]
+        })
+        del self.items[:quantidade]
+        self.base = fim
+        return True
+    
+    def push(self, item):
+        """Adiciona uma ação à missão atual (abre uma missão sem id se não houver)"""
+        if not self.missoes:
+            self.iniciar_missao(None)
+        super().push(item)
+    
+    def pop(self):
+        """Desfaz a última ação registrada"""
+        item = super().pop()
+        # Missões que perderam ações passam a terminar no novo topo, e as que
+        # ficaram vazias também passam a começar nele
+        total = self.total
+        for missao in reversed(self.missoes):
+            if missao['fim'] is not None and missao['fim'] > total:
+                missao['fim'] = total
+            if missao['inicio'] <= total:
+                break
+            missao['inicio'] = total
+        return item
+    
+    def acoes_missao_atual(self):
+        """Visão das ações da missão atual em O(1)"""
+        if not self.missoes:
+            return VisaoAcoes(self, self.total, self.total)
+        return VisaoAcoes(self, missao=self.missoes[-1])
+    
+    def ultimas_acoes(self, n):
+        """Visão das últimas n ações (de qualquer missão) em O(1)"""
+        return VisaoAcoes(self, max(self.base, self.total - n), self.total)
+    
+    def todas_acoes(self):
+        """Visão de todas as ações ainda em memória"""
+        return VisaoAcoes(self, self.base, self.total)
+    
+    def listar_missoes(self):
+        """Retorna as missões em memória com o intervalo de ações de cada uma"""
+        return [
+            {
+                'id': missao['id'],
+                'despachada_em': missao['despachada_em'],
+                'acoes': VisaoAcoes(self, missao=missao)
+            }
+            for missao in self.missoes
+        ]
+
 # Lista ligada para status das áreas
 class AreaNode:
     """
@@ -41,18 +184,23 @@ class AreaLinkedList:
         self.head = None
     
     def atualizar_status(self, nome, status):
-        """Atualiza o status de uma área ou adiciona se não existir"""
+        """
+        Atualiza o status de uma área ou adiciona se não existir.
+        Retorna o status anterior (None se a área era nova)
+        """
         node = self.head
         while node:
             if node.nome == nome:
+                anterior = node.status
                 node.status = status
-                return
+                return anterior
             node = node.next
         
         # Área não encontrada, adicionar no início
         novo = AreaNode(nome, status)
         novo.next = self.head
         self.head = novo
+        return None
     
     def get_status(self, nome):
         """Retorna o status atual de uma área"""
@@ -86,13 +234,16 @@ class TreeNode:
     Nó da árvore que representa hierarquia da região:
     Estado → Município → Zona Rural/Parque
     """
-    def __init__(self, nome, tipo="estado"):
+    def __init__(self, nome, tipo="estado", id=None):
         self.nome = nome
         self.tipo = tipo  # "estado", "municipio", "zona"
+        self.id = id  # código da região (IBGE), único na árvore
         self.filhos = []
+        self.pai = None
     
     def adicionar_filho(self, filho):
         """Adiciona um filho ao nó atual"""
+        filho.pai = self
         self.filhos.append(filho)
         return filho
     
@@ -110,3 +261,57 @@ class TreeNode:
     
     def __repr__(self):
         return f"{self.nome} ({self.tipo})"
+
+# Histograma logarítmico para estimar quantis
+class HistogramaLog:
+    """
+    Histograma com baldes de largura logarítmica para estimar quantis com
+    erro relativo limitado (precisao) sem guardar as amostras.
+    Dois histogramas com a mesma precisão podem ser mesclados somando os baldes
+    """
+    def __init__(self, precisao=0.01):
+        self.precisao = precisao
+        self.gamma = (1 + precisao) / (1 - precisao)
+        self.log_gamma = math.log(self.gamma)
+        self.baldes = {}  # índice -> quantidade
+        self.zeros = 0
+        self.total = 0
+    
+    def adicionar(self, valor, quantidade=1):
+        """Registra uma amostra (valores negativos contam como zero)"""
+        if valor <= 0:
+            self.zeros += quantidade
+        else:
+            indice = math.ceil(math.log(valor) / self.log_gamma)
+            self.baldes[indice] = self.baldes.get(indice, 0) + quantidade
+        self.total += quantidade
+    
+    def mesclar(self, outro):
+        """Soma os baldes de outro histograma a este"""
+        for indice, quantidade in outro.baldes.items():
+            self.baldes[indice] = self.baldes.get(indice, 0) + quantidade
+        self.zeros += outro.zeros
+        self.total += outro.total
+        return self
+    
+    def quantil(self, q):
+        """Retorna o valor estimado do quantil q (entre 0 e 1)"""
+        if self.total == 0:
+            return None
+        
+        # Posto mais próximo: a menor amostra com pelo menos q do total até ela
+        posto = max(1, math.ceil(q * self.total))
+        acumulado = self.zeros
+        if posto <= acumulado:
+            return 0.0
+        
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if posto <= acumulado:
+                # Ponto do balde com erro relativo máximo igual à precisão
+                return 2 * self.gamma ** indice / (self.gamma + 1)
+        
+        return 2 * self.gamma ** max(self.baldes) / (self.gamma + 1)
+    
+    def __repr__(self):
+        return f"HistogramaLog({self.total} amostras)"
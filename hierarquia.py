@@ -0,0 +1,220 @@
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from estruturas import TreeNode
+
+# Formato binário compacto da hierarquia de regiões (little-endian):
+#   cabeçalho: assinatura, versão, quantidade de nós, tamanho dos nomes,
+#              tamanho dos ids, tamanho dos tipos
+#   pais        int32[n]    índice do pai de cada nó (-1 na raiz)
+#   saidas      int32[n]    último índice da subárvore de cada nó
+#   offsets     uint32[n+1] posição de cada nome no bloco de nomes
+#   offsets_ids uint32[n+1] posição de cada id no bloco de ids
+#   tipos       uint8[n]    índice do tipo de cada nó na tabela de tipos
+#   nomes       bytes       nomes em UTF-8, concatenados
+#   ids         bytes       códigos das regiões (IBGE) em UTF-8, concatenados
+#   tabela      bytes       nomes dos tipos em UTF-8, separados por "\n"
+# Os nós são gravados em pré-ordem, então a subárvore de i ocupa [i, saidas[i]]
+ASSINATURA = b"RGBR"
+VERSAO_FORMATO = 2
+CABECALHO = struct.Struct("<4sHHIIII")
+
+DIRETORIO_DADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dados")
+ARQUIVO_REGIOES = os.path.join(DIRETORIO_DADOS, "regioes.bin")
+CSV_REGIOES = os.path.join(DIRETORIO_DADOS, "regioes.csv")
+
+
+class HierarquiaCompacta:
+    """
+    Hierarquia de regiões somente leitura armazenada em arrays planos.
+    Os arrays apontam diretamente para o arquivo mapeado em memória, e os
+    índices de nomes e de ids só são construídos na primeira busca
+    """
+    def __init__(self, pais, saidas, offsets, offsets_ids, tipos, nomes, ids, tabela_tipos, mapa=None):
+        self.pais = pais
+        self.saidas = saidas
+        self.offsets = offsets
+        self.offsets_ids = offsets_ids
+        self.tipos = tipos
+        self.nomes = nomes
+        self.ids = ids
+        self.tabela_tipos = tabela_tipos
+        self._mapa = mapa  # mantém o mmap aberto enquanto a hierarquia existir
+        self._indice_nomes = None
+        self._indice_ids = None
+    
+    def __len__(self):
+        return len(self.pais)
+    
+    def nome(self, indice):
+        """Retorna o nome do nó"""
+        return bytes(self.nomes[self.offsets[indice]:self.offsets[indice + 1]]).decode("utf-8")
+    
+    def id(self, indice):
+        """Retorna o código da região (id do IBGE)"""
+        return bytes(self.ids[self.offsets_ids[indice]:self.offsets_ids[indice + 1]]).decode("utf-8")
+    
+    def tipo(self, indice):
+        """Retorna o tipo do nó (país, estado, município, zona)"""
+        return self.tabela_tipos[self.tipos[indice]]
+    
+    def pai(self, indice):
+        """Retorna o índice do pai do nó (None na raiz)"""
+        pai = self.pais[indice]
+        return None if pai < 0 else pai
+    
+    def saida(self, indice):
+        """Retorna o último índice da subárvore do nó"""
+        return self.saidas[indice]
+    
+    def filhos(self, indice):
+        """Retorna os índices dos filhos diretos do nó"""
+        filhos = []
+        atual = indice + 1
+        fim = self.saidas[indice]
+        while atual <= fim:
+            filhos.append(atual)
+            atual = self.saidas[atual] + 1
+        return filhos
+    
+    def indices(self, nome):
+        """Retorna os índices de todos os nós com o nome, em pré-ordem"""
+        if self._indice_nomes is None:
+            indice_nomes = {}
+            for i in range(len(self)):
+                indice_nomes.setdefault(self.nome(i), []).append(i)
+            self._indice_nomes = indice_nomes
+        return self._indice_nomes.get(nome, [])
+    
+    def indice_por_id(self, id_regiao):
+        """Busca o índice de um nó pelo id (os ids são únicos)"""
+        if self._indice_ids is None:
+            self._indice_ids = {self.id(i): i for i in range(len(self))}
+        return self._indice_ids.get(id_regiao)
+    
+    def indices_por_tipo(self, tipo):
+        """Retorna os índices dos nós de um determinado tipo"""
+        if tipo not in self.tabela_tipos:
+            return []
+        codigo = self.tabela_tipos.index(tipo)
+        return [i for i, t in enumerate(self.tipos) if t == codigo]
+
+
+def salvar_hierarquia(raiz, caminho):
+    """Grava uma árvore de TreeNode no formato binário compacto"""
+    pais = array("i")
+    saidas = array("i")
+    offsets = array("I", [0])
+    offsets_ids = array("I", [0])
+    tipos = array("B")
+    nomes = bytearray()
+    ids = bytearray()
+    vistos = set()
+    tabela_tipos = []
+    
+    pilha = [(raiz, -1)]
+    while pilha:
+        no, pai = pilha.pop()
+        indice = len(pais)
+        pais.append(pai)
+        saidas.append(indice)
+        if no.tipo not in tabela_tipos:
+            tabela_tipos.append(no.tipo)
+        tipos.append(tabela_tipos.index(no.tipo))
+        nomes += no.nome.encode("utf-8")
+        offsets.append(len(nomes))
+        id_regiao = str(no.id) if no.id is not None else str(indice)
+        if id_regiao in vistos:
+            raise ValueError(f"Id de região repetido: {id_regiao}")
+        vistos.add(id_regiao)
+        ids += id_regiao.encode("utf-8")
+        offsets_ids.append(len(ids))
+        pilha.extend((filho, indice) for filho in reversed(no.filhos))
+    
+    # O fim da subárvore de um nó é o fim da subárvore do seu último descendente
+    for indice in range(len(pais) - 1, 0, -1):
+        pai = pais[indice]
+        saidas[pai] = max(saidas[pai], saidas[indice])
+    
+    blocos = [pais, saidas, offsets, offsets_ids, tipos]
+    if sys.byteorder != "little":
+        for bloco in blocos:
+            bloco.byteswap()
+    
+    tabela = "\n".join(tabela_tipos).encode("utf-8")
+    with open(caminho, "wb") as f:
+        f.write(CABECALHO.pack(ASSINATURA, VERSAO_FORMATO, 0, len(pais), len(nomes), len(ids), len(tabela)))
+        for bloco in blocos:
+            bloco.tofile(f)
+        f.write(nomes)
+        f.write(ids)
+        f.write(tabela)
+    
+    return caminho
+
+
+def carregar_hierarquia(caminho=ARQUIVO_REGIOES):
+    """Mapeia o arquivo binário em memória e retorna a HierarquiaCompacta"""
+    with open(caminho, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    assinatura, versao, _, n, tamanho_nomes, tamanho_ids, tamanho_tabela = CABECALHO.unpack_from(mapa)
+    if assinatura != ASSINATURA or versao != VERSAO_FORMATO:
+        raise ValueError(f"Arquivo de regiões inválido ou de versão incompatível: {caminho}")
+    
+    dados = memoryview(mapa)
+    posicao = CABECALHO.size
+    
+    def bloco(formato, quantidade, tamanho_item):
+        nonlocal posicao
+        fatia = dados[posicao:posicao + quantidade * tamanho_item]
+        posicao += quantidade * tamanho_item
+        if sys.byteorder == "little":
+            return fatia.cast(formato)
+        copia = array(formato, fatia.tobytes())
+        copia.byteswap()
+        return copia
+    
+    pais = bloco("i", n, 4)
+    saidas = bloco("i", n, 4)
+    offsets = bloco("I", n + 1, 4)
+    offsets_ids = bloco("I", n + 1, 4)
+    tipos = bloco("B", n, 1)
+    nomes = dados[posicao:posicao + tamanho_nomes]
+    posicao += tamanho_nomes
+    ids = dados[posicao:posicao + tamanho_ids]
+    posicao += tamanho_ids
+    tabela_tipos = bytes(dados[posicao:posicao + tamanho_tabela]).decode("utf-8").split("\n")
+    
+    return HierarquiaCompacta(pais, saidas, offsets, offsets_ids, tipos, nomes, ids, tabela_tipos, mapa)
+
+
+def arvore_de_csv(caminho=CSV_REGIOES):
+    """
+    Monta uma árvore de TreeNode a partir de um CSV com as colunas
+    id, nome, tipo, id_pai (vazio na raiz), como nas tabelas do IBGE
+    """
+    nos = {}
+    ligacoes = []
+    raiz = None
+    with open(caminho, newline="", encoding="utf-8") as f:
+        for linha in csv.DictReader(f):
+            no = TreeNode(linha["nome"], tipo=linha["tipo"], id=linha["id"])
+            nos[linha["id"]] = no
+            if linha["id_pai"]:
+                ligacoes.append((linha["id_pai"], no))
+            else:
+                raiz = no
+    
+    for id_pai, no in ligacoes:
+        nos[id_pai].adicionar_filho(no)
+    
+    return raiz
+
+
+if __name__ == "__main__":
+    # Regenera o arquivo binário a partir do CSV de regiões
+    print(salvar_hierarquia(arvore_de_csv(), ARQUIVO_REGIOES))
@@ -0,0 +1,286 @@
+import csv
+import hashlib
+import math
+import os
+import re
+import struct
+import sys
+from array import array
+
+# Formato do cache binário (little-endian), só com dados, sem objetos serializados:
+#   cabeçalho: assinatura, versão, orientação, tipo dos pesos ('q' inteiros ou
+#              'd' reais), delimitador, quantidade de nós, de arestas e tamanho dos nomes
+#   inicios  uint32[n+1]  posição das arestas de cada nó (lista de adjacência compacta)
+#   destinos uint32[m]    índice do nó de destino de cada aresta
+#   pesos    int64[m] ou float64[m]
+#   nomes    bytes        nomes dos nós em UTF-8, separados por "\0"
+ASSINATURA_CACHE = b"MAPA"
+VERSAO_CACHE = 2
+CABECALHO_CACHE = struct.Struct("<4sHBcIIII")
+MAX_INT64 = 2 ** 63 - 1
+
+# Nomes de colunas aceitos no cabeçalho do arquivo de arestas
+COLUNAS_ORIGEM = ('origem', 'from', 'source', 'u')
+COLUNAS_DESTINO = ('destino', 'to', 'target', 'v')
+COLUNAS_PESO = ('tempo', 'minutos', 'minutes', 'peso', 'weight', 'custo')
+
+
+def _converter_peso(valor):
+    """
+    Converte o peso para int quando possível, senão para float. Inteiros
+    fora do intervalo de int64 viram float, como o cache os gravaria
+    """
+    try:
+        peso = int(valor)
+    except ValueError:
+        return float(valor)
+    return peso if -MAX_INT64 - 1 <= peso <= MAX_INT64 else float(peso)
+
+
+def _validar_peso(peso, caminho, linha):
+    """Recusa pesos negativos, infinitos ou NaN, que o Dijkstra não suporta"""
+    if not (peso >= 0 and math.isfinite(peso)):
+        raise ValueError(f"{caminho}:{linha}: peso inválido {peso!r} (deve ser finito e não negativo)")
+    return peso
+
+
+def _indice_coluna(cabecalho, nomes, padrao):
+    for i, coluna in enumerate(cabecalho):
+        if coluna.strip().lower() in nomes:
+            return i
+    return padrao
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o hash do conteúdo do arquivo lendo em blocos"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def delimitador_padrao(caminho):
+    """Separador de colunas pela extensão do arquivo (tabulação para .tsv/.tab)"""
+    return '\t' if caminho.endswith(('.tsv', '.tab')) else ','
+
+
+def ler_arestas(caminho, delimitador=None):
+    """
+    Lê um arquivo de arestas (CSV, TSV ou exportação do OSM 'from,to,minutes')
+    linha a linha, gerando tuplas (origem, destino, peso).
+    O cabeçalho é opcional; sem ele, as três primeiras colunas são usadas.
+    Linhas incompletas ou com peso inválido (não numérico, negativo,
+    infinito ou NaN) geram ValueError com arquivo e linha
+    """
+    if delimitador is None:
+        delimitador = delimitador_padrao(caminho)
+    
+    with open(caminho, newline='', encoding='utf-8') as f:
+        leitor = csv.reader(f, delimiter=delimitador)
+        primeira = next(leitor, None)
+        if primeira is None:
+            return
+        if len(primeira) < 3:
+            raise ValueError(f"{caminho}:{leitor.line_num}: esperadas 3 colunas, encontradas {len(primeira)}")
+        
+        i_origem, i_destino, i_peso = 0, 1, 2
+        try:
+            peso = _converter_peso(primeira[2])
+        except ValueError:
+            # Primeira linha é o cabeçalho
+            i_origem = _indice_coluna(primeira, COLUNAS_ORIGEM, 0)
+            i_destino = _indice_coluna(primeira, COLUNAS_DESTINO, 1)
+            i_peso = _indice_coluna(primeira, COLUNAS_PESO, 2)
+        else:
+            yield primeira[0], primeira[1], _validar_peso(peso, caminho, leitor.line_num)
+        
+        for linha in leitor:
+            if not linha or linha[0].startswith('#'):
+                continue
+            try:
+                aresta = linha[i_origem], linha[i_destino], _converter_peso(linha[i_peso])
+            except (IndexError, ValueError):
+                raise ValueError(f"{caminho}:{leitor.line_num}: linha inválida {linha!r}") from None
+            _validar_peso(aresta[2], caminho, leitor.line_num)
+            yield aresta
+
+
+def montar_mapa(arestas, direcionado=False):
+    """
+    Monta o grafo no formato usado pela central {nó: {vizinho: peso, ...}}.
+    Em arestas repetidas, mantém o menor peso. Se houver pesos inteiros e
+    reais misturados, todos viram float (o mesmo que o cache devolve)
+    """
+    mapa = {}
+    intern = sys.intern
+    tipos = set()
+    for origem, destino, peso in arestas:
+        tipos.add(type(peso))
+        origem, destino = intern(origem), intern(destino)
+        vizinhos = mapa.setdefault(origem, {})
+        if peso < vizinhos.get(destino, float('inf')):
+            vizinhos[destino] = peso
+        if direcionado:
+            mapa.setdefault(destino, {})
+        else:
+            vizinhos = mapa.setdefault(destino, {})
+            if peso < vizinhos.get(origem, float('inf')):
+                vizinhos[origem] = peso
+    
+    if len(tipos) > 1:
+        for vizinhos in mapa.values():
+            for vizinho, peso in vizinhos.items():
+                vizinhos[vizinho] = float(peso)
+    return mapa
+
+
+def caminho_cache(caminho, hash_conteudo, direcionado, delimitador, diretorio_cache=None):
+    """
+    Retorna o caminho do cache para o arquivo, conteúdo, orientação e
+    delimitador informados: opções diferentes nunca compartilham um cache
+    """
+    diretorio = diretorio_cache or os.path.dirname(os.path.abspath(caminho))
+    orientacao = 'd' if direcionado else 'u'
+    nome = f"{os.path.basename(caminho)}.{hash_conteudo}.{orientacao}{ord(delimitador):02x}.mapa"
+    return os.path.join(diretorio, nome)
+
+
+def _ler_cache(caminho, direcionado, delimitador):
+    try:
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+        
+        (assinatura, versao, orientacao, tipo_pesos, codigo_delimitador,
+         n, m, tamanho_nomes) = CABECALHO_CACHE.unpack_from(dados)
+        if (assinatura != ASSINATURA_CACHE or versao != VERSAO_CACHE
+                or orientacao != int(direcionado) or codigo_delimitador != ord(delimitador)):
+            return None
+        
+        posicao = CABECALHO_CACHE.size
+        blocos = []
+        for formato, quantidade in (('I', n + 1), ('I', m), (tipo_pesos.decode(), m)):
+            bloco = array(formato)
+            tamanho = quantidade * bloco.itemsize
+            bloco.frombytes(dados[posicao:posicao + tamanho])
+            if len(bloco) != quantidade:
+                return None
+            if sys.byteorder != 'little':
+                bloco.byteswap()
+            blocos.append(bloco)
+            posicao += tamanho
+        inicios, destinos, pesos = blocos
+        
+        nomes = dados[posicao:posicao + tamanho_nomes].decode('utf-8').split('\0') if n else []
+        if len(nomes) != n:
+            return None
+        nomes = [sys.intern(nome) for nome in nomes]
+        
+        vizinhos = list(map(nomes.__getitem__, destinos))
+        pesos = pesos.tolist()
+        inicios = inicios.tolist()
+        return {
+            nome: dict(zip(vizinhos[inicio:fim], pesos[inicio:fim]))
+            for nome, inicio, fim in zip(nomes, inicios, inicios[1:])
+        }
+    except (OSError, ValueError, TypeError, IndexError, struct.error):
+        return None
+
+
+def _salvar_cache(caminho, mapa, direcionado, delimitador):
+    nomes = list(mapa)
+    if any('\0' in nome for nome in nomes):
+        raise ValueError("nomes de nós com '\\0' não podem ser gravados no cache")
+    indices = {nome: i for i, nome in enumerate(nomes)}
+    
+    inicios = array('I', [0])
+    destinos = array('I')
+    valores = []
+    for nome in nomes:
+        for destino, peso in mapa[nome].items():
+            destinos.append(indices[destino])
+            valores.append(peso)
+        inicios.append(len(destinos))
+    
+    tipo_pesos = 'q' if all(type(peso) is int for peso in valores) else 'd'
+    try:
+        pesos = array(tipo_pesos, valores)
+    except OverflowError:
+        # Inteiros além de int64 só cabem como float
+        tipo_pesos = 'd'
+        pesos = array(tipo_pesos, valores)
+    blob = '\0'.join(nomes).encode('utf-8')
+    
+    blocos = [inicios, destinos, pesos]
+    if sys.byteorder != 'little':
+        for bloco in blocos:
+            bloco.byteswap()
+    
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'wb') as f:
+        f.write(CABECALHO_CACHE.pack(
+            ASSINATURA_CACHE, VERSAO_CACHE, int(direcionado), tipo_pesos.encode(),
+            ord(delimitador), len(nomes), len(destinos), len(blob)
+        ))
+        for bloco in blocos:
+            bloco.tofile(f)
+        f.write(blob)
+    # Troca atômica: outro processo nunca lê um cache pela metade
+    os.replace(temporario, caminho)
+
+
+def _remover_caches_antigos(caminho, hash_conteudo, diretorio_cache=None):
+    """Apaga os caches do mesmo arquivo gravados para um conteúdo anterior"""
+    diretorio = diretorio_cache or os.path.dirname(os.path.abspath(caminho))
+    padrao = re.compile(re.escape(os.path.basename(caminho)) + r"\.([0-9a-f]{32})\.[du][0-9a-f]{2,}\.mapa")
+    try:
+        entradas = list(os.scandir(diretorio))
+    except OSError:
+        return
+    for entrada in entradas:
+        correspondencia = padrao.fullmatch(entrada.name)
+        if correspondencia and correspondencia.group(1) != hash_conteudo:
+            try:
+                os.remove(entrada.path)
+            except OSError:
+                pass
+
+
+def carregar_mapa(caminho, direcionado=False, delimitador=None, usar_cache=True, diretorio_cache=None):
+    """
+    Carrega a malha viária de um arquivo de arestas no formato usado pela
+    CentralQueimadas. Na primeira carga grava um cache binário identificado
+    pelo hash do arquivo, pela orientação e pelo delimitador; nas seguintes,
+    o grafo vem direto do cache. O cache guarda apenas arrays e nomes, então
+    lê-lo nunca executa código. Ao gravar um cache, os caches de versões
+    anteriores do mesmo arquivo são apagados. Em arquivos com pesos inteiros
+    e reais misturados, todos os pesos são devolvidos como float
+    
+    Args:
+        caminho: arquivo de arestas (origem, destino, tempo em minutos)
+        direcionado: se False, cada aresta vale nos dois sentidos
+        delimitador: separador de colunas (padrão: pela extensão do arquivo)
+        usar_cache: lê e grava o cache binário
+        diretorio_cache: onde guardar o cache (padrão: junto ao arquivo)
+        
+    Returns:
+        dicionário {nó: {vizinho: peso, ...}, ...}
+    """
+    if delimitador is None:
+        delimitador = delimitador_padrao(caminho)
+    if not usar_cache:
+        return montar_mapa(ler_arestas(caminho, delimitador), direcionado)
+    
+    hash_conteudo = hash_arquivo(caminho)
+    arquivo_cache = caminho_cache(caminho, hash_conteudo, direcionado, delimitador, diretorio_cache)
+    mapa = _ler_cache(arquivo_cache, direcionado, delimitador)
+    if mapa is not None:
+        return mapa
+    
+    mapa = montar_mapa(ler_arestas(caminho, delimitador), direcionado)
+    try:
+        _salvar_cache(arquivo_cache, mapa, direcionado, delimitador)
+    except (OSError, ValueError):
+        return mapa  # Sem permissão de escrita ou nomes não suportados: segue sem cache
+    _remover_caches_antigos(caminho, hash_conteudo, diretorio_cache)
+    return mapa
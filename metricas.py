@@ -0,0 +1,113 @@
+from estruturas import HistogramaLog
+
+# Janelas de consulta: nome -> (duração em segundos, número de baldes)
+JANELAS = {
+    '1h': (3600, 12),
+    '24h': (86400, 24),
+    '7d': (604800, 28),
+}
+
+PERCENTIS = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+class JanelaDeslizante:
+    """
+    Buffer circular de baldes de tempo. Cada balde guarda um histograma por
+    chave (métrica, dimensão, valor); ao avançar o tempo, o balde mais antigo
+    é reaproveitado, então a memória não cresce com o número de amostras
+    """
+    def __init__(self, duracao, num_baldes, precisao=0.01):
+        self.largura = duracao / num_baldes
+        self.num_baldes = num_baldes
+        self.precisao = precisao
+        self.epocas = [None] * num_baldes  # época de tempo de cada balde
+        self.baldes = [{} for _ in range(num_baldes)]
+        self.epoca_mais_recente = None  # maior época já registrada
+    
+    def _epoca(self, instante):
+        return int(instante // self.largura)
+    
+    def registrar(self, instante, chave, valor):
+        """
+        Adiciona uma amostra ao balde do instante informado. Amostras que
+        chegam atrasadas a ponto de já estarem fora da janela são ignoradas,
+        para não apagar o balde mais novo que ocupa a mesma posição
+        """
+        epoca = self._epoca(instante)
+        if self.epoca_mais_recente is not None and epoca <= self.epoca_mais_recente - self.num_baldes:
+            return
+        if self.epoca_mais_recente is None or epoca > self.epoca_mais_recente:
+            self.epoca_mais_recente = epoca
+        posicao = epoca % self.num_baldes
+        if self.epocas[posicao] != epoca:
+            # Balde de uma volta anterior do buffer: descarta e reutiliza
+            self.epocas[posicao] = epoca
+            self.baldes[posicao] = {}
+        
+        balde = self.baldes[posicao]
+        if chave not in balde:
+            balde[chave] = HistogramaLog(self.precisao)
+        balde[chave].adicionar(valor)
+    
+    def consultar(self, instante, chave):
+        """Mescla os histogramas da chave em todos os baldes ainda dentro da janela"""
+        epoca_atual = self._epoca(instante)
+        resultado = HistogramaLog(self.precisao)
+        for epoca, balde in zip(self.epocas, self.baldes):
+            if epoca is not None and epoca_atual - self.num_baldes < epoca <= epoca_atual and chave in balde:
+                resultado.mesclar(balde[chave])
+        return resultado
+
+
+class MetricasAtendimento:
+    """
+    Percentis de tempos de atendimento (tempo estimado de deslocamento e
+    espera entre a entrada e o despacho) nas últimas 1h, 24h e 7 dias,
+    no total e por bioma ou região
+    """
+    def __init__(self, janelas=None, precisao=0.01):
+        janelas = janelas or JANELAS
+        self.janelas = {
+            nome: JanelaDeslizante(duracao, num_baldes, precisao)
+            for nome, (duracao, num_baldes) in janelas.items()
+        }
+        self.metricas = set()
+        self.dimensoes = {}  # dimensão -> valores já registrados
+    
+    def registrar(self, instante, valores, dimensoes=()):
+        """
+        Registra as amostras de um despacho
+        
+        Args:
+            instante: momento do despacho (segundos)
+            valores: dicionário {métrica: valor}
+            dimensoes: pares (dimensão, valor), ex.: ('bioma', 'cerrado')
+        """
+        chaves = [(None, None)] + list(dimensoes)
+        for dimensao, valor_dimensao in dimensoes:
+            self.dimensoes.setdefault(dimensao, set()).add(valor_dimensao)
+        for metrica, valor in valores.items():
+            self.metricas.add(metrica)
+            for janela in self.janelas.values():
+                for dimensao, valor_dimensao in chaves:
+                    janela.registrar(instante, (metrica, dimensao, valor_dimensao), valor)
+    
+    def consultar(self, instante, metrica, janela, dimensao=None, valor=None):
+        """Retorna p50/p90/p99 e o número de amostras da métrica na janela"""
+        histograma = self.janelas[janela].consultar(instante, (metrica, dimensao, valor))
+        resultado = {}
+        for nome, q in PERCENTIS.items():
+            estimativa = histograma.quantil(q)
+            resultado[nome] = round(estimativa, 2) if estimativa is not None else None
+        resultado['amostras'] = histograma.total
+        return resultado
+    
+    def resumo(self, instante, dimensao=None, valor=None):
+        """Retorna {janela: {métrica: percentis}} para todas as janelas"""
+        return {
+            janela: {
+                metrica: self.consultar(instante, metrica, janela, dimensao, valor)
+                for metrica in sorted(self.metricas)
+            }
+            for janela in self.janelas
+        }
@@ -1,24 +1,53 @@
-from estruturas import Stack, AreaLinkedList, TreeNode
+import heapq
+from estruturas import RegistroMissoes, AreaLinkedList
+from hierarquia import ARQUIVO_REGIOES, carregar_hierarquia
+
+# Número de missões mantidas em memória por equipe quando a central guarda o histórico
+MAX_MISSOES_EQUIPE = 50
 
 class Equipe:
     """
     Classe que representa uma equipe de combate a incêndios
     """
-    def __init__(self, id, nome, local, especialidade=None):
+    def __init__(self, id, nome, local, especialidade=None, max_missoes=None):
         self.id = id
         self.nome = nome
         self.local = local
         self.especialidade = especialidade
-        self.acoes = Stack()
+        self.acoes = RegistroMissoes(max_missoes)
         self.disponivel = True
     
+    def iniciar_missao(self, missao_id, instante=None):
+        """Abre uma nova missão no registro de ações da equipe"""
+        self.acoes.iniciar_missao(missao_id, instante)
+    
     def registrar_acao(self, acao):
         """Registra uma ação realizada pela equipe"""
         self.acoes.push(acao)
     
+    def desfazer_ultima_acao(self):
+        """Remove e retorna a última ação registrada"""
+        return self.acoes.pop()
+    
     def listar_acoes(self):
-        """Retorna a lista de ações realizadas em ordem cronológica"""
-        return self.acoes.items.copy()
+        """
+        Retorna uma visão somente leitura das ações em memória, em ordem
+        cronológica. Use list() sobre o resultado para obter uma lista
+        (por exemplo, para alterá-la ou serializá-la em JSON)
+        """
+        return self.acoes.todas_acoes()
+    
+    def acoes_missao_atual(self):
+        """Retorna uma visão somente leitura das ações da missão atual"""
+        return self.acoes.acoes_missao_atual()
+    
+    def ultimas_acoes(self, n):
+        """Retorna uma visão somente leitura das últimas n ações"""
+        return self.acoes.ultimas_acoes(n)
+    
+    def listar_missoes(self):
+        """Retorna as missões em memória com as respectivas ações"""
+        return self.acoes.listar_missoes()
     
     def to_dict(self):
         """Converte a equipe para um dicionário"""
@@ -34,13 +63,16 @@ class Chamada:
     """
     Classe que representa uma chamada de emergência
     """
-    def __init__(self, id, local, severidade, tipo_vegetacao, clima=None, detalhes=None):
+    def __init__(self, id, local, severidade, tipo_vegetacao, clima=None, detalhes=None, recebida_em=None):
         self.id = id
         self.local = local
         self.severidade = severidade
         self.tipo_vegetacao = tipo_vegetacao
         self.clima = clima
-        self.detalhes = detalhes or {}
+        # Cópia própria: o agrupamento de chamadas altera os detalhes do incidente
+        self.detalhes = dict(detalhes or {})
+        self.recebida_em = recebida_em  # timestamp de entrada na central
+        self.ultimo_reporte_em = recebida_em  # último reporte agrupado a esta chamada
         self.prioridade = None
     
     @classmethod
@@ -52,7 +84,8 @@ class Chamada:
             severidade=data['severidade'],
             tipo_vegetacao=data['tipo_vegetacao'],
             clima=data.get('clima'),
-            detalhes=data.get('detalhes', {})
+            detalhes=data.get('detalhes', {}),
+            recebida_em=data.get('recebida_em')
         )
     
     def to_dict(self):
@@ -64,53 +97,241 @@ class Chamada:
             'tipo_vegetacao': self.tipo_vegetacao,
             'clima': self.clima,
             'prioridade': self.prioridade,
+            'recebida_em': self.recebida_em,
             'detalhes': self.detalhes
         }
 
+class NoRegiao:
+    """
+    Visão somente leitura de um nó da hierarquia de regiões.
+    Oferece os mesmos atributos de um TreeNode (id, nome, tipo, pai, filhos)
+    sem materializar a árvore inteira em objetos
+    """
+    __slots__ = ("hierarquia", "entrada")
+    
+    def __init__(self, hierarquia, indice):
+        self.hierarquia = hierarquia
+        self.entrada = indice  # posição do nó no percurso em pré-ordem
+    
+    @property
+    def id(self):
+        return self.hierarquia.id(self.entrada)
+    
+    @property
+    def nome(self):
+        return self.hierarquia.nome(self.entrada)
+    
+    @property
+    def tipo(self):
+        return self.hierarquia.tipo(self.entrada)
+    
+    @property
+    def saida(self):
+        return self.hierarquia.saida(self.entrada)
+    
+    @property
+    def pai(self):
+        pai = self.hierarquia.pai(self.entrada)
+        return None if pai is None else NoRegiao(self.hierarquia, pai)
+    
+    @property
+    def filhos(self):
+        return [NoRegiao(self.hierarquia, i) for i in self.hierarquia.filhos(self.entrada)]
+    
+    def __eq__(self, outro):
+        return (isinstance(outro, NoRegiao) and outro.hierarquia is self.hierarquia
+                and outro.entrada == self.entrada)
+    
+    def __hash__(self):
+        return hash(self.entrada)
+    
+    def __repr__(self):
+        return f"{self.nome} ({self.tipo})"
+
+
 class RegiaoBrasil:
-    """Classe que representa a hierarquia geográfica de uma região do Brasil"""
-    def __init__(self):
-        self.root = None
-        self._inicializar_regioes()
-    
-    def _inicializar_regioes(self):
-        """Inicializa a árvore hierárquica com alguns estados e municípios"""
-        self.root = TreeNode("Brasil", tipo="país")
-        
-        estado_sp = self.root.adicionar_filho(TreeNode("São Paulo", tipo="estado"))
-        estado_mt = self.root.adicionar_filho(TreeNode("Mato Grosso", tipo="estado"))
-        estado_am = self.root.adicionar_filho(TreeNode("Amazonas", tipo="estado"))
-        
-        sp_capital = estado_sp.adicionar_filho(TreeNode("São Paulo", tipo="município"))
-        sp_capital.adicionar_filho(TreeNode("Zona Norte", tipo="zona"))
-        sp_capital.adicionar_filho(TreeNode("Zona Sul", tipo="zona"))
-        campinas = estado_sp.adicionar_filho(TreeNode("Campinas", tipo="município"))
-        campinas.adicionar_filho(TreeNode("Mata Santa Genebra", tipo="zona"))
-        
-        cuiaba = estado_mt.adicionar_filho(TreeNode("Cuiabá", tipo="município"))
-        cuiaba.adicionar_filho(TreeNode("Pantanal Norte", tipo="zona"))
-        pocone = estado_mt.adicionar_filho(TreeNode("Poconé", tipo="município"))
-        pocone.adicionar_filho(TreeNode("Mata Alta", tipo="zona"))
+    """
+    Classe que representa a hierarquia geográfica de uma região do Brasil.
+    A hierarquia é lida do arquivo binário de regiões apenas no primeiro uso
+    e nunca é alterada, então uma mesma instância pode ser compartilhada
+    entre várias centrais (ver RegiaoBrasil.compartilhada)
+    """
+    _compartilhadas = {}  # arquivo -> instância
+    
+    def __init__(self, arquivo=ARQUIVO_REGIOES):
+        self.arquivo = arquivo
+        self._hierarquia = None
+    
+    @classmethod
+    def compartilhada(cls, arquivo=ARQUIVO_REGIOES):
+        """Retorna a instância compartilhada para o arquivo de regiões"""
+        if arquivo not in cls._compartilhadas:
+            cls._compartilhadas[arquivo] = cls(arquivo)
+        return cls._compartilhadas[arquivo]
+    
+    @property
+    def hierarquia(self):
+        """Hierarquia compacta, carregada do arquivo no primeiro acesso"""
+        if self._hierarquia is None:
+            self._hierarquia = carregar_hierarquia(self.arquivo)
+        return self._hierarquia
+    
+    @property
+    def root(self):
+        return NoRegiao(self.hierarquia, 0)
+    
+    def __len__(self):
+        return len(self.hierarquia)
+    
+    def buscar_por_id(self, id_regiao):
+        """Busca uma região pelo id do IBGE"""
+        indice = self.hierarquia.indice_por_id(id_regiao)
+        return None if indice is None else NoRegiao(self.hierarquia, indice)
+    
+    def buscar_por_nome(self, nome):
+        """Retorna todas as regiões com o nome (ex.: o estado e o município de São Paulo)"""
+        return [NoRegiao(self.hierarquia, i) for i in self.hierarquia.indices(nome)]
+    
+    def buscar_zona(self, local):
+        """
+        Busca uma região pelo id ou, se não houver id igual, pelo nome.
+        Levanta ValueError se o nome pertencer a mais de uma região
+        """
+        no = self.buscar_por_id(local)
+        if no is not None:
+            return no
         
-        manaus = estado_am.adicionar_filho(TreeNode("Manaus", tipo="município"))
-        manaus.adicionar_filho(TreeNode("Reserva Ducke", tipo="zona"))
+        nos = self.buscar_por_nome(local)
+        if len(nos) > 1:
+            candidatos = ", ".join(f"{no.id} ({no.tipo})" for no in nos)
+            raise ValueError(f"Nome de região ambíguo: '{local}' corresponde a {candidatos}; use o id")
+        return nos[0] if nos else None
     
-    def buscar_zona(self, nome):
-        """Busca uma zona pelo nome"""
-        return self.root.buscar_no(nome)
+    def listar_por_tipo(self, tipo):
+        """Retorna os nós de um determinado tipo (estado, município, zona)"""
+        return [NoRegiao(self.hierarquia, i) for i in self.hierarquia.indices_por_tipo(tipo)]
     
-    def obter_hierarquia_completa(self, zona_nome):
+    def obter_hierarquia_completa(self, zona):
         """Retorna a hierarquia completa de uma zona (estado -> município -> zona)"""
-        no = self.buscar_zona(zona_nome)
+        no = self.buscar_zona(zona)
         if not no:
             return None
         
         hierarquia = []
         atual = no
         
-        while atual and atual.nome != "Brasil":
-            hierarquia.append({"nome": atual.nome, "tipo": atual.tipo})
+        while atual and atual.pai is not None:
+            hierarquia.append({"id": atual.id, "nome": atual.nome, "tipo": atual.tipo})
             atual = atual.pai
 
         hierarquia.reverse()
         return hierarquia
+
+
+class StatusRegioes:
+    """
+    Contadores de áreas por status agregados na hierarquia de regiões.
+    Cada mudança de status atualiza a contagem do nó da área e de todos os
+    seus ancestrais (profundidade <= 4), então contar as áreas de qualquer
+    região custa O(1). Para o ranking das regiões mais afetadas, cada nova
+    contagem é publicada em um heap de máximo por (status, tipo), com
+    entradas versionadas: as desatualizadas são descartadas ao chegarem ao topo
+    """
+    def __init__(self, regiao):
+        self.regiao = regiao
+        self.contagens = {}  # status -> {índice do nó: [quantidade, versão]}
+        self.rankings = {}  # (status, tipo) -> heap de (-quantidade, índice, versão)
+    
+    def _atualizar_contagens(self, indice, status, delta):
+        """Soma delta à área e a cada ancestral e publica a nova contagem no heap do tipo"""
+        hierarquia = self.regiao.hierarquia
+        contagens = self.contagens.setdefault(status, {})
+        while indice is not None:
+            contagem = contagens.setdefault(indice, [0, 0])
+            contagem[0] += delta
+            contagem[1] += 1
+            ranking = self.rankings.setdefault((status, hierarquia.tipo(indice)), [])
+            heapq.heappush(ranking, (-contagem[0], indice, contagem[1]))
+            # Reconstrói quando as entradas desatualizadas dominam o heap
+            if len(ranking) > 2 * len(contagens) + 64:
+                ranking[:] = [
+                    (-quantidade, i, versao)
+                    for i, (quantidade, versao) in contagens.items()
+                    if hierarquia.tipo(i) == hierarquia.tipo(indice)
+                ]
+                heapq.heapify(ranking)
+            indice = hierarquia.pai(indice)
+    
+    def registrar(self, local, status_anterior, status_novo):
+        """Move a área do contador do status anterior para o novo status"""
+        no = self.regiao.buscar_zona(local)
+        if not no or status_anterior == status_novo:
+            return
+        
+        if status_anterior is not None:
+            self._atualizar_contagens(no.entrada, status_anterior, -1)
+        if status_novo is not None:
+            self._atualizar_contagens(no.entrada, status_novo, 1)
+    
+    def _quantidade(self, status, indice):
+        """Quantidade de áreas no status dentro da subárvore do nó"""
+        contagem = self.contagens.get(status, {}).get(indice)
+        return contagem[0] if contagem else 0
+    
+    def contar(self, regiao, status=None):
+        """
+        Conta as áreas dentro de uma região (id ou nome). Sem status, retorna
+        um dicionário {status: quantidade} com os status presentes
+        """
+        no = self.regiao.buscar_zona(regiao)
+        if not no:
+            return 0 if status is not None else {}
+        
+        if status is not None:
+            return self._quantidade(status, no.entrada)
+        
+        contagem = {}
+        for st in self.contagens:
+            total = self._quantidade(st, no.entrada)
+            if total:
+                contagem[st] = total
+        return contagem
+    
+    def contar_por_subregiao(self, regiao, status):
+        """Retorna {id da subregião: quantidade} para os filhos diretos da região"""
+        no = self.regiao.buscar_zona(regiao)
+        if not no:
+            return {}
+        
+        return {filho.id: self._quantidade(status, filho.entrada) for filho in no.filhos}
+    
+    def mais_afetadas(self, k, status, tipo="município"):
+        """Retorna as k regiões do tipo informado com mais áreas no status, em O(k log n)"""
+        ranking = self.rankings.get((status, tipo))
+        if not ranking:
+            return []
+        
+        contagens = self.contagens[status]
+        validas = []
+        while ranking and len(validas) < k:
+            entrada = heapq.heappop(ranking)
+            quantidade, indice, versao = -entrada[0], entrada[1], entrada[2]
+            if contagens[indice][1] != versao:
+                continue  # entrada substituída por uma contagem mais recente
+            if quantidade <= 0:
+                heapq.heappush(ranking, entrada)
+                break
+            validas.append(entrada)
+        
+        # Devolve as entradas válidas ao heap para as próximas consultas
+        for entrada in validas:
+            heapq.heappush(ranking, entrada)
+        
+        return [
+            {
+                "id": self.regiao.hierarquia.id(indice),
+                "nome": self.regiao.hierarquia.nome(indice),
+                "quantidade": -quantidade
+            }
+            for quantidade, indice, _ in validas
+        ]